@@ -149,8 +149,11 @@ class MFRC522:
             channel=0,
             baud=1000000,
             debug_level="WARNING",
+            pi=None,
+            rf_profile=None,
     ):
-        self.pi = pigpio.pi()
+        self.rf_profile = rf_profile
+        self.pi = pi if pi is not None else pigpio.pi()
         self.spi = self.pi.spi_open(channel, baud, pigpio.SPI_MODE_3)
 
         self.reset_gpio = reset_gpio
@@ -353,6 +356,12 @@ class MFRC522:
         # Return the status
         return status
 
+    def mfrc522_halt(self):
+        buff = [self.PICC_HALT, 0]
+        # A halted card does not answer, MI_TIMEOUT is the expected outcome
+        status, backData, backLen = self.mfrc522_transeive_helper(buff)
+        return status
+
     def mfrc522_stop_crypto1(self):
         self.clear_bit_mask(self.Status2Reg, 0x08)
 
@@ -387,9 +396,7 @@ class MFRC522:
         ):
             status = self.MI_ERR
 
-        self.logger.debug(
-            "%s backdata &0x0F == 0x0A %s" % (backLen, backData[0] & 0x0F)
-        )
+        self.logger.debug("%s backdata %s" % (backLen, backData))
         if status == self.MI_OK:
             buf = []
             buf.extend(write_data)
@@ -401,9 +408,12 @@ class MFRC522:
                     or not ((backData[0] & 0x0F) == 0x0A)
             ):
                 self.logger.error(f"Error while writing block {block_addr}")
+                status = self.MI_ERR
             if status == self.MI_OK:
                 self.logger.debug(f"Data written to block {block_addr}")
 
+        return status
+
     def mfrc522_decrement(self, block_addr, delta):
         buff = [self.PICC_DECREMENT, block_addr]
         status, backData, backLen = self.mfrc522_transeive_helper(buff)
@@ -504,8 +514,18 @@ class MFRC522:
 
         self.write_mfrc522(self.TxAutoReg, 0x40)
         self.write_mfrc522(self.ModeReg, 0x3D)
+        if self.rf_profile is not None:
+            self.apply_rf_profile(self.rf_profile)
         self.antenna_on()
 
+    def apply_rf_profile(self, profile):
+        self.write_mfrc522(self.RFCfgReg, profile.rf_cfg)
+        self.write_mfrc522(self.RxThresholdReg, profile.rx_threshold)
+        self.write_mfrc522(self.GsNReg, profile.gs_n)
+        self.write_mfrc522(self.CWGsPReg, profile.cw_gs_p)
+        self.write_mfrc522(self.ModGsPReg, profile.mod_gs_p)
+        self.rf_profile = profile
+
     @staticmethod
     def value_to_bytes(value):
         return list(value.to_bytes(4, "little"))
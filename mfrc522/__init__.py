@@ -1,4 +1,7 @@
 from .MFRC522 import MFRC522
 from .SimpleMFRC522 import SimpleMFRC522
+from .provisioning import CardImage, CardProvisioner
+from .trace import SPITraceRecorder, SPITraceReplay
+from .tuning import RFCalibrator, RFMonitor, RFProfile, load_rf_profile, save_rf_profile
 
 name = "mfrc522"
@@ -0,0 +1,256 @@
+import time
+
+from .MFRC522 import MFRC522
+from .exceptions import MFRC522Exception
+
+DEFAULT_KEY = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
+# Transport configuration: key A/B and data blocks read/write with key A
+DEFAULT_ACCESS_BITS = b"\xff\x07\x80\x69"
+
+
+class CardImage:
+    """
+    Precompiled contents for a MIFARE Classic 1K card.
+
+    Blocks are stored as 16 byte strings keyed by block address. Sector
+    trailers are written last in their sector, so the keys that are
+    replaced stay valid until all data blocks of that sector are written.
+    """
+
+    SECTORS = 16
+    BLOCKS_PER_SECTOR = 4
+
+    def __init__(self):
+        self.blocks = {}
+
+    @classmethod
+    def trailer_block(cls, sector):
+        return sector * cls.BLOCKS_PER_SECTOR + cls.BLOCKS_PER_SECTOR - 1
+
+    @classmethod
+    def sector_of(cls, block_addr):
+        return block_addr // cls.BLOCKS_PER_SECTOR
+
+    def set_block(self, block_addr: int, data):
+        if not 0 < block_addr < self.SECTORS * self.BLOCKS_PER_SECTOR:
+            raise MFRC522Exception(f"Block {block_addr} cannot be provisioned")
+        if block_addr % self.BLOCKS_PER_SECTOR == self.BLOCKS_PER_SECTOR - 1:
+            raise MFRC522Exception(
+                f"Block {block_addr} is a sector trailer, use set_sector_trailer"
+            )
+        if len(data) != 16:
+            raise MFRC522Exception("16 bytes needed")
+
+        self.blocks[block_addr] = bytes(data)
+
+    def set_value_block(self, block_addr: int, value: int = 0):
+        self.set_block(
+            block_addr, MFRC522.format_value_block(value, block_addr)
+        )
+
+    def set_sector_trailer(
+            self, sector: int, key_a, access_bits=DEFAULT_ACCESS_BITS, key_b=None
+    ):
+        key_b = key_b if key_b is not None else DEFAULT_KEY
+        if not 0 <= sector < self.SECTORS:
+            raise MFRC522Exception(f"Sector {sector} cannot be provisioned")
+        if len(key_a) != 6 or len(key_b) != 6:
+            raise MFRC522Exception("6 byte keys needed")
+        if len(access_bits) != 4:
+            raise MFRC522Exception("4 access bytes needed")
+        # Malformed access bits lock the sector for good once written
+        if not self.check_access_bits(access_bits):
+            raise MFRC522Exception(
+                f"{bytes(access_bits).hex()} are not valid access bits"
+            )
+
+        self.blocks[self.trailer_block(sector)] = (
+                bytes(key_a) + bytes(access_bits) + bytes(key_b)
+        )
+
+    @staticmethod
+    def check_access_bits(access_bits):
+        return (
+                access_bits[0] & 0x0F == ~access_bits[1] >> 4 & 0x0F
+                and access_bits[0] >> 4 == ~access_bits[2] & 0x0F
+                and access_bits[1] & 0x0F == ~access_bits[2] >> 4 & 0x0F
+        )
+
+    def key_a(self, sector):
+        trailer = self.blocks.get(self.trailer_block(sector))
+        if trailer is None:
+            return None
+        return list(trailer[:6])
+
+    def sectors(self):
+        return sorted({self.sector_of(block_addr) for block_addr in self.blocks})
+
+    def sector_blocks(self, sector):
+        """Block addresses of a sector in write order, trailer last."""
+        first = sector * self.BLOCKS_PER_SECTOR
+        return [
+            block_addr
+            for block_addr in range(first, first + self.BLOCKS_PER_SECTOR)
+            if block_addr in self.blocks
+        ]
+
+
+class ProvisioningStats:
+    """
+    Throughput of a provisioning run.
+
+    `failures` counts cards, a card retried while it stays in the field is
+    counted once and dropped again when it completes later. Every failed
+    pass is counted in `failed_attempts`.
+    """
+
+    def __init__(self):
+        self.cards = 0
+        self.failed_attempts = 0
+        self.failed = set()
+        self.started = time.monotonic()
+
+    @property
+    def failures(self):
+        return len(self.failed)
+
+    def record_success(self, hid):
+        self.cards += 1
+        self.failed.discard(hid)
+
+    def record_failure(self, hid):
+        self.failed_attempts += 1
+        self.failed.add(hid)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def cards_per_minute(self):
+        elapsed = self.elapsed
+        if not elapsed:
+            return 0.0
+        return self.cards * 60 / elapsed
+
+    def __str__(self):
+        return (
+            f"{self.cards} cards, {self.failures} failed cards "
+            f"({self.failed_attempts} failed attempts), "
+            f"{self.cards_per_minute:.1f} cards/min"
+        )
+
+
+class CardProvisioner:
+    """
+    Writes a CardImage to every presented card.
+
+    Each sector is authenticated once. Sectors that were completed on a
+    card are remembered by UID, so a card pulled mid-write resumes where it
+    stopped when presented again.
+    """
+
+    def __init__(self, reader, image: CardImage, key=None, verify=True):
+        self.reader = reader
+        self.image = image
+        self.key = key or DEFAULT_KEY
+        self.verify = verify
+        self.stats = ProvisioningStats()
+        self.progress = {}
+        self.provisioned = set()
+
+    def provision(self):
+        """Block until a card that was not provisioned before is completed."""
+        while True:
+            cards = self.stats.cards
+            hid, done = self.provision_no_block()
+            if done and self.stats.cards != cards:
+                return hid
+
+    def provision_no_block(self):
+        uid = self._select_card()
+        if uid is None:
+            return None, False
+
+        hid = bytes(uid[:4]).hex()
+        if hid in self.provisioned:
+            self.reader.mfrc522_halt()
+            return hid, True
+
+        completed = self.progress.setdefault(hid, set())
+        try:
+            for sector in self.image.sectors():
+                if sector in completed:
+                    continue
+                if not self._write_sector(sector, uid):
+                    self.stats.record_failure(hid)
+                    self.reader.logger.warning(
+                        f"Provisioning {hid} interrupted in sector {sector}"
+                    )
+                    return hid, False
+                completed.add(sector)
+            # A finished card is halted so the next pass does not select it
+            # again. HLTA goes out before Crypto1 is stopped, an authenticated
+            # card only accepts it encrypted.
+            self.reader.mfrc522_halt()
+        finally:
+            self.reader.mfrc522_stop_crypto1()
+
+        del self.progress[hid]
+        self.provisioned.add(hid)
+        self.stats.record_success(hid)
+        self.reader.logger.debug(f"Provisioned {hid}, {self.stats}")
+        return hid, True
+
+    def _select_card(self, req_mode=None):
+        if req_mode is None:
+            req_mode = self.reader.PICC_REQIDL
+        status, tag_type = self.reader.mfrc522_request(req_mode)
+        if status != self.reader.MI_OK:
+            return None
+        status, uid = self.reader.mfrc522_anticoll()
+        if status != self.reader.MI_OK:
+            return None
+        self.reader.mfrc522_select_tag(uid)
+        return uid
+
+    def _auth_sector(self, sector, uid):
+        trailer = self.image.trailer_block(sector)
+        status = self.reader.mfrc522_auth(
+            self.reader.PICC_AUTHENT1A, trailer, self.key, uid
+        )
+        if status == self.reader.MI_OK:
+            return True
+
+        # The trailer may already be written from an interrupted run, a
+        # failed auth halts the card so it has to be woken up with WUPA.
+        key_a = self.image.key_a(sector)
+        if key_a is None or key_a == list(self.key):
+            return False
+        self.reader.mfrc522_stop_crypto1()
+        if self._select_card(self.reader.PICC_REQALL) != uid:
+            return False
+        status = self.reader.mfrc522_auth(
+            self.reader.PICC_AUTHENT1A, trailer, key_a, uid
+        )
+        return status == self.reader.MI_OK
+
+    def _write_sector(self, sector, uid):
+        if not self._auth_sector(sector, uid):
+            return False
+
+        for block_addr in self.image.sector_blocks(sector):
+            data = self.image.blocks[block_addr]
+            status = self.reader.mfrc522_write(block_addr, list(data))
+            if status != self.reader.MI_OK:
+                return False
+
+            # Keys of a sector trailer always read back as zeros
+            if self.verify and block_addr != self.image.trailer_block(sector):
+                try:
+                    if bytes(self.reader.mfrc522_read(block_addr)) != data:
+                        return False
+                except MFRC522Exception:
+                    return False
+
+        return True
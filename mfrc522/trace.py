@@ -0,0 +1,194 @@
+import logging
+import struct
+import time
+from collections import defaultdict, deque, namedtuple
+
+from .exceptions import MFRC522Exception
+
+TRACE_MAGIC = b"MFRC522T"
+TRACE_VERSION = 1
+
+# timestamp (seconds since start of recording), pigpio count, tx length
+_RECORD = struct.Struct("<dhB")
+
+logger = logging.getLogger("mfrc522Logger")
+
+TraceRecord = namedtuple("TraceRecord", ["timestamp", "tx", "count", "rx"])
+
+
+def write_trace_header(fh):
+    fh.write(TRACE_MAGIC + bytes([TRACE_VERSION]))
+
+
+def write_trace_record(fh, record: TraceRecord):
+    fh.write(_RECORD.pack(record.timestamp, record.count, len(record.tx)))
+    fh.write(bytes(record.tx))
+    fh.write(bytes(record.rx[: max(record.count, 0)]))
+
+
+def read_trace(fh):
+    """
+    Read all complete records of a trace.
+
+    A trace cut short by a crash ends in a partial record, which is dropped
+    with a warning so the transfers leading up to the crash stay usable.
+    """
+    header = fh.read(len(TRACE_MAGIC) + 1)
+    if len(header) != len(TRACE_MAGIC) + 1 or header[:-1] != TRACE_MAGIC:
+        raise MFRC522Exception("Not an SPI trace file")
+    if header[-1] != TRACE_VERSION:
+        raise MFRC522Exception(f"Unsupported trace version {header[-1]}")
+
+    records = []
+    while True:
+        raw = fh.read(_RECORD.size)
+        if not raw:
+            break
+        if len(raw) == _RECORD.size:
+            timestamp, count, tx_len = _RECORD.unpack(raw)
+            tx = fh.read(tx_len)
+            rx = fh.read(max(count, 0))
+            if len(tx) == tx_len and len(rx) == max(count, 0):
+                records.append(TraceRecord(timestamp, tx, count, rx))
+                continue
+        logger.warning(
+            f"Truncated trace record after {len(records)} transfers, ignored"
+        )
+        break
+
+    return records
+
+
+def load_trace(path):
+    with open(path, "rb") as fh:
+        return read_trace(fh)
+
+
+class SPITraceRecorder:
+    """
+    Wraps a pigpio.pi instance and appends every spi_xfer to a binary trace.
+
+    All other attributes are passed through to the wrapped instance, so the
+    recorder can be handed to MFRC522 in place of the pi object.
+    """
+
+    def __init__(self, pi, path):
+        self.pi = pi
+        self.transfer_count = 0
+        self._fh = open(path, "wb")
+        self._start = time.monotonic()
+        write_trace_header(self._fh)
+        self._fh.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.pi, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def spi_xfer(self, handle, data):
+        count, rx_data = self.pi.spi_xfer(handle, data)
+        write_trace_record(
+            self._fh,
+            TraceRecord(time.monotonic() - self._start, bytes(data), count, rx_data),
+        )
+        # Flushed per transfer so a crashed or killed process leaves a
+        # usable trace behind
+        self._fh.flush()
+        self.transfer_count += 1
+        return count, rx_data
+
+    def stop(self):
+        self.close()
+        return self.pi.stop()
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+
+
+class SPITraceReplay:
+    """
+    Stands in for pigpio.pi and answers spi_xfer from a recorded trace.
+
+    Replay is deterministic, timestamps are not honoured. In strict mode
+    every transfer must match the recorded one, otherwise MFRC522Exception
+    is raised.
+
+    With strict=False register reads are answered per register: each read
+    of a register returns the next value recorded for it, falling back to
+    the last value written or read once the recording for that register is
+    used up. This tolerates library versions that issue a different number
+    or order of transfers, so transfer_count can be compared between them,
+    as long as they read each register's answers in the same order.
+    """
+
+    def __init__(self, path=None, records=None, strict=True):
+        self.records = records if records is not None else load_trace(path)
+        self.strict = strict
+        self.transfer_count = 0
+        self.registers = [0] * 0x40
+        self.reads = defaultdict(deque)
+        for record in self.records:
+            if record.tx[0] & 0x80 and record.count > 1:
+                self.reads[(record.tx[0] >> 1) & 0x3F].append(record.rx[1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    @property
+    def exhausted(self):
+        if not self.strict:
+            return not any(self.reads.values())
+        return self.transfer_count >= len(self.records)
+
+    def spi_open(self, channel, baud, flags=0):
+        return 0
+
+    def spi_close(self, handle):
+        return 0
+
+    def spi_xfer(self, handle, data):
+        if not self.strict:
+            return self._register_xfer(data)
+
+        if self.exhausted:
+            raise MFRC522Exception(
+                f"Trace exhausted after {self.transfer_count} transfers"
+            )
+
+        record = self.records[self.transfer_count]
+        if bytes(data) != record.tx:
+            raise MFRC522Exception(
+                f"Transfer {self.transfer_count} diverged from trace: "
+                f"sent {bytes(data).hex()}, recorded {record.tx.hex()}"
+            )
+
+        self.transfer_count += 1
+        return record.count, bytearray(record.rx)
+
+    def _register_xfer(self, data):
+        addr = (data[0] >> 1) & 0x3F
+        self.transfer_count += 1
+        if not data[0] & 0x80:
+            self.registers[addr] = data[1]
+            return len(data), bytearray(len(data))
+
+        if self.reads[addr]:
+            self.registers[addr] = self.reads[addr].popleft()
+        return len(data), bytearray([0, self.registers[addr]])
+
+    def set_mode(self, gpio, mode):
+        return 0
+
+    def write(self, gpio, level):
+        return 0
+
+    def stop(self):
+        pass
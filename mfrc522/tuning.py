@@ -0,0 +1,191 @@
+import json
+import time
+from collections import deque, namedtuple
+from itertools import product
+
+from .exceptions import MFRC522Exception
+
+RFProfile = namedtuple(
+    "RFProfile",
+    ["rf_cfg", "rx_threshold", "gs_n", "cw_gs_p", "mod_gs_p"],
+    # Register reset values, see MFRC522 datasheet section 9.3.3
+    defaults=[0x48, 0x84, 0x88, 0x20, 0x20],
+)
+
+CalibrationResult = namedtuple(
+    "CalibrationResult", ["profile", "success_rate", "latency"]
+)
+
+
+def default_profiles():
+    """Receiver gain 33-48 dB, two MinLevel thresholds, two driver strengths."""
+    return [
+        RFProfile(gain << 4, min_level << 4 | 0x04, gs_n, cw_gs_p, cw_gs_p)
+        for gain, min_level, (gs_n, cw_gs_p) in product(
+            range(4, 8), (0x8, 0x5), ((0x88, 0x20), (0xFF, 0x3F))
+        )
+    ]
+
+
+def save_rf_profile(profile: RFProfile, path):
+    with open(path, "w") as fh:
+        json.dump(profile._asdict(), fh)
+
+
+def load_rf_profile(path):
+    with open(path, "r") as fh:
+        try:
+            profile = RFProfile(**json.load(fh))
+        except (TypeError, ValueError) as e:
+            raise MFRC522Exception(f"Invalid RF profile {path}: {e}")
+
+    for field, value in profile._asdict().items():
+        if type(value) is not int or not 0 <= value <= 0xFF:
+            raise MFRC522Exception(
+                f"Invalid RF profile {path}: {field} must be a register value"
+            )
+
+    return profile
+
+
+class RFCalibrator:
+    """
+    Sweeps RF profiles against a card held in the field.
+
+    Every profile is probed `attempts` times with a wake-up, anticollision,
+    select and halt cycle. The best profile has the highest success rate,
+    ties are broken by the lower mean latency of successful probes. The
+    card is woken up again after the sweep, so it is left ready instead of
+    halted.
+    """
+
+    def __init__(self, reader, profiles=None, attempts=20):
+        self.reader = reader
+        self.profiles = profiles or default_profiles()
+        self.attempts = attempts
+        self.results = []
+
+    @property
+    def probe_count(self):
+        return len(self.profiles) * self.attempts
+
+    def probe(self):
+        """Return the wake-up to select latency, or None if the card did not answer."""
+        started = time.monotonic()
+        status, tag_type = self.reader.mfrc522_request(self.reader.PICC_REQALL)
+        if status != self.reader.MI_OK:
+            return None
+        status, uid = self.reader.mfrc522_anticoll()
+        if status != self.reader.MI_OK:
+            return None
+        size = self.reader.mfrc522_select_tag(uid)
+        # A halted card never answers, keep the HALT timeout out of the latency
+        latency = time.monotonic() - started
+        self.reader.mfrc522_halt()
+        return latency if size else None
+
+    def measure(self, profile: RFProfile):
+        self.reader.apply_rf_profile(profile)
+        successes = 0
+        latency = 0.0
+        for _ in range(self.attempts):
+            probe_latency = self.probe()
+            if probe_latency is not None:
+                successes += 1
+                latency += probe_latency
+
+        return CalibrationResult(
+            profile,
+            successes / self.attempts,
+            latency / successes if successes else None,
+        )
+
+    def calibrate(self):
+        previous = self.reader.rf_profile
+        # Probes after an authenticated operation would go out encrypted
+        self.reader.mfrc522_stop_crypto1()
+        self.results = [self.measure(profile) for profile in self.profiles]
+        for result in self.results:
+            self.reader.logger.debug(
+                "%s success %.2f latency %s"
+                % (result.profile, result.success_rate, result.latency)
+            )
+
+        best = max(
+            self.results,
+            key=lambda r: (
+                r.success_rate,
+                -(float("inf") if r.latency is None else r.latency),
+            ),
+        )
+        if not best.success_rate:
+            self.reader.logger.warning("No card answered during RF calibration")
+            self.reader.apply_rf_profile(
+                previous if previous is not None else RFProfile()
+            )
+            return None
+
+        self.reader.apply_rf_profile(best.profile)
+        # Probes leave the card halted, wake it so pollers see it again
+        self.reader.mfrc522_request(self.reader.PICC_REQALL)
+        return best.profile
+
+
+class RFMonitor:
+    """
+    Tracks the outcome of card operations and re-calibrates on drift.
+
+    Call record() after every operation. Once the error rate over the last
+    `window` operations exceeds `max_error_rate` the monitor has drifted.
+    With auto_recalibrate the calibrator then runs inside record(), which
+    blocks for `calibrator.probe_count` probes. Without it the caller
+    checks `drifted` and calls recalibrate() when convenient.
+    """
+
+    def __init__(
+            self,
+            calibrator: RFCalibrator,
+            window=50,
+            max_error_rate=0.2,
+            auto_recalibrate=True,
+    ):
+        self.calibrator = calibrator
+        self.outcomes = deque(maxlen=window)
+        self.max_error_rate = max_error_rate
+        self.auto_recalibrate = auto_recalibrate
+        self.recalibrations = 0
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def drifted(self):
+        return (
+                len(self.outcomes) == self.outcomes.maxlen
+                and self.error_rate > self.max_error_rate
+        )
+
+    def record(self, success: bool):
+        """
+        Record an operation outcome.
+
+        Returns the new profile if a re-tune ran, None otherwise. The card in
+        the field is woken up after a re-tune, a poller using PICC_REQIDL may
+        need one extra request before it answers again.
+        """
+        self.outcomes.append(bool(success))
+        if self.auto_recalibrate and self.drifted:
+            return self.recalibrate()
+
+    def recalibrate(self):
+        self.calibrator.reader.logger.warning(
+            f"Error rate {self.error_rate:.2f} above "
+            f"{self.max_error_rate:.2f}, re-tuning RF with "
+            f"{self.calibrator.probe_count} probes"
+        )
+        self.outcomes.clear()
+        self.recalibrations += 1
+        return self.calibrator.calibrate()
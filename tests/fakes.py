@@ -0,0 +1,198 @@
+from mfrc522.MFRC522 import MFRC522
+
+UID = [97, 98, 99, 100]
+HID = "61626364"
+DEFAULT_KEY = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
+
+
+def crc_a(data):
+    crc = 0x6363
+    for b in data:
+        b ^= crc & 0xFF
+        b ^= (b << 4) & 0xFF
+        crc = (crc >> 8) ^ (b << 8) ^ (b << 3) ^ (b >> 4)
+    return [crc & 0xFF, (crc >> 8) & 0xFF]
+
+
+class FakePi:
+    """Register file standing in for pigpio.pi on the SPI bus."""
+
+    def __init__(self):
+        self.registers = [0] * 0x40
+
+    def spi_open(self, channel, baud, flags=0):
+        return 0
+
+    def spi_close(self, handle):
+        return 0
+
+    def spi_xfer(self, handle, data):
+        addr = (data[0] >> 1) & 0x3F
+        if data[0] & 0x80:
+            return 2, bytearray([0, self.read_register(addr)])
+        self.write_register(addr, data[1] & 0xFF)
+        return 2, bytearray([0, 0])
+
+    def read_register(self, addr):
+        return self.registers[addr]
+
+    def write_register(self, addr, val):
+        self.registers[addr] = val
+
+    def set_mode(self, gpio, mode):
+        return 0
+
+    def write(self, gpio, level):
+        return 0
+
+    def stop(self):
+        pass
+
+
+class FakeCardPi(FakePi):
+    """
+    FakePi with the FIFO, CRC coprocessor and a MIFARE Classic 1K card.
+
+    The card follows the ISO 14443A states idle, ready, active and halted.
+    A failed authentication halts it, as on a real card. Setting
+    remove_after_writes takes the card out of the field after that many
+    block writes, fail_write NAKs the first write to that block and
+    min_rf_cfg keeps the card silent while RFCfgReg is below it.
+    """
+
+    def __init__(
+            self, uid=None, remove_after_writes=None, fail_write=None, min_rf_cfg=0
+    ):
+        super().__init__()
+        self.uid = list(uid or UID)
+        self.blocks = {i: bytes(16) for i in range(64)}
+        for sector in range(16):
+            self.blocks[sector * 4 + 3] = bytes(DEFAULT_KEY) + bytes(10)
+        self.fifo = []
+        self.state = "idle"
+        self.present = True
+        self.authenticated = None
+        self.pending_write = None
+        self.remove_after_writes = remove_after_writes
+        self.fail_write = fail_write
+        self.auths = 0
+        self.min_rf_cfg = min_rf_cfg
+        self.frames = []
+
+    def read_register(self, addr):
+        if addr == MFRC522.FIFODataReg:
+            return self.fifo.pop(0) if self.fifo else 0
+        if addr == MFRC522.FIFOLevelReg:
+            return len(self.fifo)
+        return self.registers[addr]
+
+    def write_register(self, addr, val):
+        if addr == MFRC522.FIFODataReg:
+            self.fifo.append(val)
+        elif addr == MFRC522.FIFOLevelReg:
+            if val & 0x80:
+                self.fifo = []
+        elif addr == MFRC522.CommandReg:
+            self.execute(val)
+        else:
+            if addr == MFRC522.Status2Reg and not val & 0x08:
+                self.authenticated = None
+            self.registers[addr] = val
+
+    def execute(self, command):
+        frame, self.fifo = self.fifo, []
+        if command == MFRC522.PCD_CALCCRC:
+            crc = crc_a(frame)
+            self.registers[MFRC522.CRCResultRegL] = crc[0]
+            self.registers[MFRC522.CRCResultRegM] = crc[1]
+            self.registers[MFRC522.DivIrqReg] |= 0x04
+        elif command == MFRC522.PCD_AUTHENT:
+            self.registers[MFRC522.CommIrqReg] = 0x10
+            if self.authenticate(frame):
+                self.registers[MFRC522.ErrorReg] = 0x00
+                self.registers[MFRC522.Status2Reg] |= 0x08
+            else:
+                self.registers[MFRC522.ErrorReg] = 0x01
+        elif command == MFRC522.PCD_TRANSCEIVE:
+            self.frames.append(frame)
+            self.registers[MFRC522.ErrorReg] = 0x00
+            response = self.respond(frame) if self.in_field else None
+            if response is None:
+                self.registers[MFRC522.CommIrqReg] = 0x01
+                self.registers[MFRC522.ControlReg] = 0x00
+            else:
+                self.fifo, last_bits = response
+                self.registers[MFRC522.CommIrqReg] = 0x30
+                self.registers[MFRC522.ControlReg] = last_bits
+
+    @property
+    def in_field(self):
+        return self.present and self.registers[MFRC522.RFCfgReg] >= self.min_rf_cfg
+
+    def authenticate(self, frame):
+        block_addr, key, uid = frame[1], frame[2:8], frame[8:12]
+        self.auths += 1
+        if (
+                self.in_field
+                and self.state == "active"
+                and uid == self.uid
+                and bytes(key) == self.blocks[block_addr | 0x03][:6]
+        ):
+            self.authenticated = block_addr // 4
+            return True
+        self.state = "halted"
+        self.authenticated = None
+        return False
+
+    def respond(self, frame):
+        ack = ([0x0A], 4)
+        if self.registers[MFRC522.BitFramingReg] & 0x07 == 0x07:
+            if frame == [MFRC522.PICC_REQALL] and self.state in ("idle", "halted"):
+                self.state = "ready"
+                return [0x04, 0x00], 0
+            if frame == [MFRC522.PICC_REQIDL] and self.state == "idle":
+                self.state = "ready"
+                return [0x04, 0x00], 0
+            if self.state != "halted":
+                self.state = "idle"
+            return None
+
+        if self.pending_write is not None:
+            block_addr, self.pending_write = self.pending_write, None
+            self.blocks[block_addr] = bytes(frame[:16])
+            if self.remove_after_writes is not None:
+                self.remove_after_writes -= 1
+                if self.remove_after_writes <= 0:
+                    self.remove_after_writes = None
+                    self.present = False
+            return ack
+
+        command = frame[0]
+        if frame[:2] == [MFRC522.PICC_ANTICOLL, 0x20] and self.state == "ready":
+            return self.uid + [MFRC522.calculate_bcc(self.uid)], 0
+        if frame[:2] == [MFRC522.PICC_SElECTTAG, 0x70] and self.state == "ready":
+            if frame[2:6] != self.uid:
+                return None
+            self.state = "active"
+            return [0x08] + crc_a([0x08]), 0
+        if command == MFRC522.PICC_HALT:
+            self.state = "halted"
+            self.authenticated = None
+            return None
+        if self.state != "active" or self.authenticated != frame[1] // 4:
+            return self.nak()
+        if command == MFRC522.PICC_READ:
+            data = list(self.blocks[frame[1]])
+            return data + crc_a(data), 0
+        if command == MFRC522.PICC_WRITE:
+            if frame[1] == self.fail_write:
+                self.fail_write = None
+                return self.nak()
+            self.pending_write = frame[1]
+            return ack
+        return self.nak()
+
+    def nak(self):
+        self.state = "idle"
+        self.authenticated = None
+        return [0x04], 4
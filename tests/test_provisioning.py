@@ -0,0 +1,112 @@
+import unittest
+
+from mfrc522.MFRC522 import MFRC522
+from mfrc522.exceptions import MFRC522Exception
+from mfrc522.provisioning import CardImage, CardProvisioner
+from tests.fakes import HID, FakeCardPi
+
+KEY = [0xA0, 0xA1, 0xA2, 0xA3, 0xA4, 0xA5]
+
+
+def make_image():
+    image = CardImage()
+    image.set_block(4, b"provisioned card")
+    image.set_value_block(5, 100)
+    image.set_sector_trailer(1, KEY)
+    image.set_block(8, b"second sector!!!")
+    return image
+
+
+class TestCardImage(unittest.TestCase):
+    def test_sector_order(self):
+        image = make_image()
+        self.assertEqual(image.sectors(), [1, 2])
+        self.assertEqual(image.sector_blocks(1), [4, 5, 7])
+        self.assertEqual(image.key_a(1), KEY)
+
+    def test_reject_manufacturer_and_trailer(self):
+        image = CardImage()
+        with self.assertRaises(MFRC522Exception):
+            image.set_block(0, bytes(16))
+        with self.assertRaises(MFRC522Exception):
+            image.set_block(7, bytes(16))
+
+    def test_reject_sector_trailer(self):
+        image = CardImage()
+        with self.assertRaises(MFRC522Exception):
+            image.set_sector_trailer(16, KEY)
+        with self.assertRaises(MFRC522Exception):
+            image.set_sector_trailer(1, KEY, access_bits=b"\x00\x00\x00\x00")
+        image.set_sector_trailer(1, KEY, access_bits=b"\x78\x77\x88\x00")
+        self.assertEqual(image.sectors(), [1])
+
+
+class TestCardProvisioner(unittest.TestCase):
+    def make_provisioner(self, **kwargs):
+        pi = FakeCardPi(**kwargs)
+        return pi, CardProvisioner(MFRC522(25, pi=pi), make_image())
+
+    def test_provision(self):
+        pi, provisioner = self.make_provisioner()
+        self.assertEqual(provisioner.provision(), HID)
+        self.assertEqual(pi.auths, 2)
+        self.assertEqual(pi.blocks[4], b"provisioned card")
+        self.assertEqual(MFRC522.get_block_value(pi.blocks[5]), 100)
+        self.assertEqual(pi.blocks[7][:6], bytes(KEY))
+        self.assertEqual(pi.blocks[8], b"second sector!!!")
+        self.assertEqual(provisioner.stats.cards, 1)
+
+    def test_finished_card_halted(self):
+        pi, provisioner = self.make_provisioner()
+        provisioner.provision()
+        self.assertEqual(pi.state, "halted")
+        frames = len(pi.frames)
+        self.assertEqual(provisioner.provision_no_block(), (None, False))
+        # Only the unanswered REQA went out
+        self.assertEqual(len(pi.frames), frames + 1)
+
+    def test_already_provisioned(self):
+        pi, provisioner = self.make_provisioner()
+        provisioner.provision()
+        # Card taken out and presented again
+        pi.state = "idle"
+        self.assertEqual(provisioner.provision_no_block(), (HID, True))
+        self.assertEqual(pi.auths, 2)
+        self.assertEqual(pi.state, "halted")
+        self.assertEqual(provisioner.stats.cards, 1)
+
+    def test_resume_after_interrupt(self):
+        pi, provisioner = self.make_provisioner(fail_write=8)
+        self.assertEqual(provisioner.provision_no_block(), (HID, False))
+        self.assertEqual(provisioner.progress[HID], {1})
+        self.assertEqual(provisioner.provision_no_block(), (HID, True))
+        self.assertEqual(pi.auths, 3)
+        self.assertEqual(pi.blocks[8], b"second sector!!!")
+        self.assertEqual(provisioner.stats.failures, 0)
+        self.assertEqual(provisioner.stats.failed_attempts, 1)
+
+    def test_resume_after_pull(self):
+        # Pulled right after sector 1's trailer was written
+        pi, provisioner = self.make_provisioner(remove_after_writes=3)
+        self.assertEqual(provisioner.provision_no_block(), (HID, False))
+        self.assertEqual(pi.blocks[7][:6], bytes(KEY))
+        self.assertEqual(
+            provisioner.reader.mfrc522_write(8, list(bytes(16))), MFRC522.MI_ERR
+        )
+
+        pi.present, pi.state = True, "idle"
+        provisioner.progress.clear()
+        # Sector 1 now only opens with the new key, the failed auth with the
+        # transport key halts the card and it is woken up with WUPA
+        self.assertEqual(provisioner.provision_no_block(), (HID, True))
+        self.assertEqual(pi.blocks[4], b"provisioned card")
+        self.assertEqual(pi.blocks[8], b"second sector!!!")
+
+    def test_failure_counted_once(self):
+        pi, provisioner = self.make_provisioner()
+        pi.blocks[11] = bytes(KEY) + pi.blocks[11][6:]
+        for _ in range(3):
+            pi.state = "idle"
+            self.assertEqual(provisioner.provision_no_block(), (HID, False))
+        self.assertEqual(provisioner.stats.failures, 1)
+        self.assertEqual(provisioner.stats.failed_attempts, 3)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from mfrc522.MFRC522 import MFRC522
+from mfrc522.exceptions import MFRC522Exception
+from mfrc522.trace import SPITraceRecorder, SPITraceReplay, load_trace
+from tests.fakes import FakePi
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def record(self):
+        recorder = SPITraceRecorder(FakePi(), self.path)
+        reader = MFRC522(25, pi=recorder)
+        reader.write_mfrc522(MFRC522.RFCfgReg, 0x70)
+        value = reader.read_mfrc522(MFRC522.RFCfgReg)
+        reader.close_mfrc522()
+        return recorder, value
+
+    def test_record_then_load(self):
+        recorder, value = self.record()
+        records = load_trace(self.path)
+        self.assertEqual(value, 0x70)
+        self.assertEqual(len(records), recorder.transfer_count)
+        self.assertEqual(records[-1].rx, bytes([0, 0x70]))
+        self.assertTrue(
+            all(a.timestamp <= b.timestamp for a, b in zip(records, records[1:]))
+        )
+
+    def test_flushed_while_open(self):
+        recorder = SPITraceRecorder(FakePi(), self.path)
+        MFRC522(25, pi=recorder)
+        self.assertEqual(len(load_trace(self.path)), recorder.transfer_count)
+        recorder.close()
+
+    def test_truncated_tail(self):
+        recorder, _ = self.record()
+        with open(self.path, "r+b") as fh:
+            fh.truncate(os.path.getsize(self.path) - 1)
+        with self.assertLogs("mfrc522Logger", "WARNING"):
+            records = load_trace(self.path)
+        self.assertEqual(len(records), recorder.transfer_count - 1)
+
+    def test_replay(self):
+        recorder, _ = self.record()
+        replay = SPITraceReplay(self.path)
+        reader = MFRC522(25, pi=replay)
+        reader.write_mfrc522(MFRC522.RFCfgReg, 0x70)
+        self.assertEqual(reader.read_mfrc522(MFRC522.RFCfgReg), 0x70)
+        self.assertTrue(replay.exhausted)
+        self.assertEqual(replay.transfer_count, recorder.transfer_count)
+
+    def test_replay_divergence(self):
+        self.record()
+        reader = MFRC522(25, pi=SPITraceReplay(self.path))
+        with self.assertRaises(MFRC522Exception):
+            reader.write_mfrc522(MFRC522.RFCfgReg, 0x40)
+
+    def test_register_replay(self):
+        recorder, _ = self.record()
+        replay = SPITraceReplay(self.path, strict=False)
+        reader = MFRC522(25, pi=replay)
+        # Different transfers than recorded are answered from register state
+        reader.write_mfrc522(MFRC522.GsNReg, 0x88)
+        self.assertEqual(reader.read_mfrc522(MFRC522.RFCfgReg), 0x70)
+        self.assertEqual(reader.read_mfrc522(MFRC522.GsNReg), 0x88)
+        self.assertTrue(replay.exhausted)
+        self.assertEqual(replay.transfer_count, recorder.transfer_count + 1)
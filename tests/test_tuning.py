@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mfrc522.MFRC522 import MFRC522
+from mfrc522.exceptions import MFRC522Exception
+from mfrc522.tuning import (
+    CalibrationResult,
+    RFCalibrator,
+    RFMonitor,
+    RFProfile,
+    default_profiles,
+    load_rf_profile,
+    save_rf_profile,
+)
+from tests.fakes import FakeCardPi, FakePi
+
+REGISTERS = (
+    MFRC522.RFCfgReg,
+    MFRC522.RxThresholdReg,
+    MFRC522.GsNReg,
+    MFRC522.CWGsPReg,
+    MFRC522.ModGsPReg,
+)
+
+
+class TestRFProfile(unittest.TestCase):
+    def test_save_then_load(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            profile = RFProfile(rf_cfg=0x70, gs_n=0xFF)
+            save_rf_profile(profile, path)
+            self.assertEqual(load_rf_profile(path), profile)
+        finally:
+            os.remove(path)
+
+    def test_load_invalid(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for value in ("0x70", 300, -1, 1.5):
+                with open(path, "w") as fh:
+                    json.dump(RFProfile(rf_cfg=value)._asdict(), fh)
+                with self.assertRaises(MFRC522Exception):
+                    load_rf_profile(path)
+        finally:
+            os.remove(path)
+
+    def test_applied_on_init(self):
+        pi = FakePi()
+        profile = RFProfile(0x70, 0x55, 0xFF, 0x3F, 0x3F)
+        MFRC522(25, pi=pi, rf_profile=profile)
+        self.assertEqual(
+            [pi.registers[reg] for reg in REGISTERS],
+            list(profile),
+        )
+
+
+class TestHalt(unittest.TestCase):
+    def test_halt(self):
+        pi = FakeCardPi()
+        reader = MFRC522(25, pi=pi)
+        status, tag_type = reader.mfrc522_request(MFRC522.PICC_REQIDL)
+        self.assertEqual(status, MFRC522.MI_OK)
+        status, uid = reader.mfrc522_anticoll()
+        self.assertEqual(reader.mfrc522_select_tag(uid), 8)
+        self.assertNotEqual(reader.mfrc522_halt(), MFRC522.MI_OK)
+        self.assertEqual(pi.state, "halted")
+        self.assertEqual(pi.frames[-1][:2], [MFRC522.PICC_HALT, 0])
+        status, tag_type = reader.mfrc522_request(MFRC522.PICC_REQIDL)
+        self.assertEqual(status, MFRC522.MI_ERR)
+        status, tag_type = reader.mfrc522_request(MFRC522.PICC_REQALL)
+        self.assertEqual(status, MFRC522.MI_OK)
+
+
+class FixedCalibrator(RFCalibrator):
+    def __init__(self, reader, results):
+        super().__init__(reader, profiles=[r.profile for r in results])
+        self.fixed = {r.profile: r for r in results}
+
+    def measure(self, profile: RFProfile):
+        return self.fixed[profile]
+
+
+class TestRFCalibrator(unittest.TestCase):
+    def test_pick_best(self):
+        pi = FakeCardPi(min_rf_cfg=0x60)
+        reader = MFRC522(25, pi=pi)
+        calibrator = RFCalibrator(reader, attempts=3)
+        best = calibrator.calibrate()
+        self.assertGreaterEqual(best.rf_cfg, 0x60)
+        self.assertEqual(reader.rf_profile, best)
+        self.assertEqual(pi.registers[MFRC522.RFCfgReg], best.rf_cfg)
+        self.assertEqual(len(calibrator.results), len(default_profiles()))
+
+    def test_zero_latency_ranks_best(self):
+        fast, slow, silent = RFProfile(0x70), RFProfile(0x60), RFProfile(0x50)
+        calibrator = FixedCalibrator(
+            MFRC522(25, pi=FakeCardPi()),
+            [
+                CalibrationResult(silent, 0.0, None),
+                CalibrationResult(slow, 1.0, 0.5),
+                CalibrationResult(fast, 1.0, 0.0),
+            ],
+        )
+        self.assertEqual(calibrator.calibrate(), fast)
+
+    def test_card_woken_after_calibration(self):
+        pi = FakeCardPi()
+        reader = MFRC522(25, pi=pi)
+        calibrator = RFCalibrator(reader, profiles=[RFProfile()], attempts=2)
+        self.assertEqual(calibrator.calibrate(), RFProfile())
+        self.assertEqual(calibrator.results[0].success_rate, 1.0)
+        self.assertEqual(pi.state, "ready")
+
+    def test_crypto1_stopped(self):
+        pi = FakeCardPi()
+        reader = MFRC522(25, pi=pi)
+        pi.registers[MFRC522.Status2Reg] |= 0x08
+        RFCalibrator(reader, profiles=[RFProfile()], attempts=1).calibrate()
+        self.assertFalse(pi.registers[MFRC522.Status2Reg] & 0x08)
+
+    def test_no_card(self):
+        pi = FakeCardPi(min_rf_cfg=0x100)
+        reader = MFRC522(25, pi=pi, rf_profile=RFProfile(0x58))
+        self.assertIsNone(RFCalibrator(reader, attempts=1).calibrate())
+        self.assertEqual(reader.rf_profile, RFProfile(0x58))
+        self.assertEqual(pi.registers[MFRC522.RFCfgReg], 0x58)
+
+    def test_no_card_without_profile(self):
+        pi = FakeCardPi(min_rf_cfg=0x100)
+        reader = MFRC522(25, pi=pi)
+        self.assertIsNone(RFCalibrator(reader, attempts=1).calibrate())
+        self.assertEqual(reader.rf_profile, RFProfile())
+        self.assertEqual(
+            [pi.registers[reg] for reg in REGISTERS], list(RFProfile())
+        )
+
+
+class TestRFMonitor(unittest.TestCase):
+    def test_recalibrate_on_drift(self):
+        reader = MFRC522(25, pi=FakeCardPi(min_rf_cfg=0x70))
+        monitor = RFMonitor(
+            RFCalibrator(reader, attempts=1), window=4, max_error_rate=0.3
+        )
+        for success in (True, True, True, False):
+            self.assertIsNone(monitor.record(success))
+        monitor.record(False)
+        self.assertEqual(monitor.recalibrations, 1)
+        self.assertEqual(reader.rf_profile.rf_cfg, 0x70)
+
+    def test_manual_recalibrate(self):
+        reader = MFRC522(25, pi=FakeCardPi(min_rf_cfg=0x70))
+        monitor = RFMonitor(
+            RFCalibrator(reader, attempts=1), window=2, auto_recalibrate=False
+        )
+        monitor.record(False)
+        self.assertIsNone(monitor.record(False))
+        self.assertTrue(monitor.drifted)
+        self.assertEqual(monitor.recalibrate().rf_cfg, 0x70)
+        self.assertFalse(monitor.drifted)